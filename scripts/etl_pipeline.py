@@ -1,11 +1,13 @@
-import json
+import orjson
 import os
+import io
 import glob
 import pandas as pd
 from datetime import datetime
 import re
 import psycopg2
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from dotenv import load_dotenv
 import numpy as np
 
@@ -31,6 +33,29 @@ DB_PARAMS = {
     'port': os.getenv('POSTGRES_PORT') 
 }
 
+# Format of the event timestamps in the input files
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# Low-cardinality string columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = ['action', 'device_type', 'referrer_category', 'content_category']
+
+# Date components stored as SMALLINT columns
+DATE_PART_COLUMNS = ['event_hour', 'event_day', 'event_month', 'event_year', 'event_dayofweek']
+
+# Datetime columns loaded into DATE columns
+DATE_COLUMNS = ['event_date']
+
+# Read buffer for JSON input files
+READ_BUFFER_SIZE = 1 << 20
+
+# URL pattern capturing content category and article ID in one scan; each
+# group sits in its own optional lookahead so either matches independently
+URL_PATTERN = re.compile(r'^(?=(?:.*?news\.example\.com/([^/]+))?)(?=(?:.*?article-(\d+))?)')
+
+# String columns normalized to lowercase during transformation; derived
+# columns such as referrer_category are produced lowercase already
+LOWERCASE_COLUMNS = ['user_id', 'session_id', 'page_url', 'action', 'device_type', 'referrer', 'content_category']
+
 def create_engine():
     """Create postgres engine from DB parameters"""
     return f"postgresql://{DB_PARAMS['user']}:{DB_PARAMS['password']}@{DB_PARAMS['host']}:{DB_PARAMS['port']}/{DB_PARAMS['database']}"
@@ -51,41 +76,64 @@ def connect_to_db():
         logger.error(f"Error connecting to PostgreSQL database: {e}")
         raise
 
-def extract_data(data_dir):
+def read_json_file(file_path):
+    """
+    Read the records from a single JSON file (array or line-delimited)
+    """
+    try:
+        logger.info(f"Processing file: {file_path}")
+        
+        with open(file_path, 'rb', buffering=READ_BUFFER_SIZE) as file:
+            # Check if file contains array of JSON objects or line-delimited JSON
+            # by sniffing the first non-whitespace byte
+            first_byte = file.read(1)
+            while first_byte and first_byte.isspace():
+                first_byte = file.read(1)
+            file.seek(0)
+            
+            if first_byte == b'[':
+                # Handle JSON array format
+                data_list = orjson.loads(file.read())
+            else:
+                # Handle line-delimited JSON (one JSON object per line)
+                data_list = []
+                for line in file:
+                    if line.strip():
+                        data_list.append(orjson.loads(line))
+        
+        logger.info(f"Successfully processed {len(data_list)} records from {file_path}")
+        return data_list
+        
+    except Exception as e:
+        logger.error(f"Error processing file {file_path}: {e}")
+        return []
+
+def extract_data(data_dir, max_workers=1):
     """
     Extract data from JSON files in the specified directory
+    
+    Args:
+        data_dir: Directory containing JSON files
+        max_workers: Number of worker processes used to parse files. Files
+            are parsed sequentially by default; parsed records have to be
+            pickled back from the workers, so a pool only pays off for many
+            large files on a multi-core machine
     """
     logger.info(f"Starting data extraction from {data_dir}")
-    all_data = []
     json_files = glob.glob(os.path.join(data_dir, "*.json"))
     
     if not json_files:
         logger.warning(f"No JSON files found in {data_dir}")
         return pd.DataFrame()
     
-    for file_path in json_files:
-        try:
-            logger.info(f"Processing file: {file_path}")
-            
-            # If file contains multiple JSON objects (one per line)
-            with open(file_path, 'r') as file:
-                file_content = file.read()
-                # Check if file contains array of JSON objects or line-delimited JSON
-                if file_content.strip().startswith('['):
-                    # Handle JSON array format
-                    data_list = json.loads(file_content)
-                else:
-                    # Handle line-delimited JSON (one JSON object per line)
-                    data_list = []
-                    for line in file_content.strip().split('\n'):
-                        if line.strip():
-                            data_list.append(json.loads(line))
-            
-            all_data.extend(data_list)
-            logger.info(f"Successfully processed {len(data_list)} records from {file_path}")
-            
-        except Exception as e:
-            logger.error(f"Error processing file {file_path}: {e}")
+    if max_workers == 1 or len(json_files) == 1:
+        file_records = [read_json_file(file_path) for file_path in json_files]
+    else:
+        # Files are independent, so parse them in parallel
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            file_records = list(executor.map(read_json_file, json_files))
+    
+    all_data = [record for records in file_records for record in records]
     
     if not all_data:
         logger.warning("No data was extracted from any files")
@@ -105,55 +153,75 @@ def transform_data(df):
         return df
     logger.info("Starting data transformation")
     
-    # Make a copy 
-    transformed_df = df.copy()
+    # Shallow copy: every step below assigns whole columns, so the caller's
+    # frame is never mutated and the data need not be duplicated
+    transformed_df = df.copy(deep=False)
     
     try:
         #  Handle missing values
-        for col in transformed_df.columns:
-            missing_count = transformed_df[col].isna().sum()
-            if missing_count > 0:
-                logger.info(f"Column {col} has {missing_count} missing values")
-        
-        #  Convert timestamp to datetime
-        transformed_df['timestamp'] = pd.to_datetime(transformed_df['timestamp'])
-        
-        #  Extract date and time components for analysis
-        transformed_df['event_date'] = transformed_df['timestamp'].dt.date
-        transformed_df['event_time'] = transformed_df['timestamp'].dt.time
-        transformed_df['event_hour'] = transformed_df['timestamp'].dt.hour
-        transformed_df['event_day'] = transformed_df['timestamp'].dt.day
-        transformed_df['event_month'] = transformed_df['timestamp'].dt.month
-        transformed_df['event_year'] = transformed_df['timestamp'].dt.year
-        transformed_df['event_dayofweek'] = transformed_df['timestamp'].dt.dayofweek
-        transformed_df['is_weekend'] = transformed_df['event_dayofweek'].isin([5, 6])
+        missing_counts = transformed_df.isna().sum()
+        missing_counts = missing_counts[missing_counts > 0]
+        if not missing_counts.empty:
+            logger.info(f"Columns with missing values: {missing_counts.to_dict()}")
         
-        # Extract content category and article ID from page_url
-        transformed_df['content_category'] = transformed_df['page_url'].apply(
-            lambda url: extract_category(url)
+        #  Convert timestamp to datetime using the generator's fixed ISO 8601
+        #  format so pandas skips per-row format inference
+        transformed_df['timestamp'] = pd.to_datetime(
+            transformed_df['timestamp'], format=TIMESTAMP_FORMAT, utc=True, cache=True
         )
         
-        transformed_df['article_id'] = transformed_df['page_url'].apply(
-            lambda url: extract_article_id(url)
-        )
+        #  Extract date components for analysis; the time of day is already
+        #  carried by timestamp
+        transformed_df['event_date'] = transformed_df['timestamp'].dt.floor('D')
+        transformed_df['event_hour'] = transformed_df['timestamp'].dt.hour.astype('int16')
+        transformed_df['event_day'] = transformed_df['timestamp'].dt.day.astype('int16')
+        transformed_df['event_month'] = transformed_df['timestamp'].dt.month.astype('int16')
+        transformed_df['event_year'] = transformed_df['timestamp'].dt.year.astype('int16')
+        transformed_df['event_dayofweek'] = transformed_df['timestamp'].dt.dayofweek.astype('int16')
+        transformed_df['is_weekend'] = transformed_df['event_dayofweek'].values >= 5
+        
+        # Extract content category and article ID from page_url
+        url_parts = transformed_df['page_url'].str.extract(URL_PATTERN).fillna('unknown')
+        transformed_df['content_category'] = url_parts[0]
+        transformed_df['article_id'] = url_parts[1]
         
-        #  Categorize referrer sources
-        transformed_df['referrer_category'] = transformed_df['referrer'].apply(categorize_referrer)
+        #  Categorize referrer sources into direct/search/social/news/email/other;
+        #  the first matching condition wins. There are only a handful of distinct
+        #  referrers, so categorize each unique value once and broadcast back
+        #  through the factorize codes
+        referrer_codes, unique_referrers = pd.factorize(transformed_df['referrer'].fillna('').astype(str))
+        referrer = pd.Series(unique_referrers, dtype=str)
+        conditions = [
+            referrer.eq(''),
+            referrer.str.contains('google', regex=False),
+            referrer.str.contains('facebook|twitter|instagram|social', regex=True),
+            referrer.str.contains('news|nytimes|cnn', regex=True),
+            referrer.str.contains('email|newsletter', regex=True)
+        ]
+        choices = ['direct', 'search', 'social', 'news', 'email']
+        referrer_categories = np.select(conditions, choices, default='other')
+        transformed_df['referrer_category'] = referrer_categories[referrer_codes]
         
-        # Convert all string columns to lowercase for consistency
-        for col in transformed_df.select_dtypes(include=['object']).columns:
-            # Check if the column has any non-null values before applying str methods
-            if transformed_df[col].notna().any():
-                transformed_df[col] = transformed_df[col].astype(str).str.lower()
-            else:
-                # Handle columns that are all null
-                logger.info(f"Column {col} contains all null values, skipping string conversion")
+        # Convert free-text string columns to lowercase for consistency
+        for col in LOWERCASE_COLUMNS:
+            if col in transformed_df.columns:
+                transformed_df[col] = [
+                    value.lower() if isinstance(value, str) else value
+                    for value in transformed_df[col].values
+                ]
+        
+        # Store low-cardinality columns as categoricals (small integer codes)
+        for col in CATEGORICAL_COLUMNS:
+            if col in transformed_df.columns:
+                transformed_df[col] = transformed_df[col].astype('category')
         
         #  Generate a unique interaction_id if it doesn't exist
         if 'interaction_id' not in transformed_df.columns:
-            transformed_df['interaction_id'] = transformed_df.apply(
-                lambda row: f"{row['user_id']}_{row['session_id']}_{int(row['timestamp'].timestamp())}", 
-                axis=1
+            epoch_seconds = transformed_df['timestamp'].astype('int64') // 10**9
+            transformed_df['interaction_id'] = (
+                transformed_df['user_id'].astype(str) + '_' +
+                transformed_df['session_id'].astype(str) + '_' +
+                epoch_seconds.astype(str)
             )
         
         logger.info(f"Transformation complete. Shape after transformation: {transformed_df.shape}")
@@ -163,36 +231,17 @@ def transform_data(df):
         logger.error(f"Error during transformation: {e}")
         raise
 
-def extract_category(url):
-    """Extract content category from URL"""
-    pattern = r'news\.example\.com/([^/]+)'
-    match = re.search(pattern, url)
-    return match.group(1) if match else 'unknown'
-
-def extract_article_id(url):
-    """Extract article ID from URL"""
-    pattern = r'article-(\d+)'
-    match = re.search(pattern, url)
-    return match.group(1) if match else 'unknown'
-
-def categorize_referrer(referrer):
-    """Categorize referrer into source types"""
-    if pd.isna(referrer) or referrer == '':
-        return 'direct'
-    elif 'google' in referrer:
-        return 'search'
-    elif 'facebook' in referrer or 'twitter' in referrer or 'instagram' in referrer or 'social' in referrer:
-        return 'social'
-    elif 'news' in referrer or 'nytimes' in referrer or 'cnn' in referrer:
-        return 'news'
-    elif 'email' in referrer or 'newsletter' in referrer:
-        return 'email'
-    else:
-        return 'other'
-
-def load_data(df, table_name='user_interactions'):
+def load_data(df, table_name='user_interactions', batch_size=10000, synchronous_commit=True):
     """
-    Load transformed data into PostgreSQL database using dict conversion
+    Load transformed data into PostgreSQL database via COPY into a staging table
+    
+    Args:
+        df: Transformed DataFrame to load
+        table_name: Target table
+        batch_size: Number of rows sent per COPY
+        synchronous_commit: Set to False for bulk loads to skip waiting on the
+            WAL flush at commit; a crash right after the load may then lose it,
+            and since the load is idempotent it can simply be re-run
     """
     if df.empty:
         logger.warning("No data to load")
@@ -203,52 +252,68 @@ def load_data(df, table_name='user_interactions'):
     try:
         # Connect to database
         conn = connect_to_db()
-        cursor = conn.cursor()    
-        records = df.to_dict('records')
+        cursor = conn.cursor()
+        if not synchronous_commit:
+            cursor.execute("SET synchronous_commit = off")
+        
+        # Format datetimes once for the whole frame
+        load_df = df.copy()
+        for col in load_df.select_dtypes(include=['datetime', 'datetimetz']).columns:
+            date_format = '%Y-%m-%d' if col in DATE_COLUMNS else '%Y-%m-%d %H:%M:%S'
+            load_df[col] = load_df[col].dt.strftime(date_format)
+        
+        # Missing values turn integer columns into floats, and COPY rejects
+        # text like "11.0" or "11.5" for an integer column. Round float columns
+        # whose target type is integer, as the INSERT assignment cast did
+        cursor.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND table_name = %s
+          AND data_type IN ('smallint', 'integer', 'bigint')
+        """, (table_name,))
+        integer_columns = {col for (col,) in cursor.fetchall()}
+        for col in load_df.select_dtypes(include=['float']).columns:
+            if col in integer_columns:
+                load_df[col] = load_df[col].round().astype('Int64')
         
         # Get column names
-        columns = list(records[0].keys())
+        columns = list(load_df.columns)
         columns_str = ", ".join(columns)
-        placeholders = ", ".join(["%s"] * len(columns))
         
-        # Create the SQL query with ON CONFLICT
-        insert_query = f"""
+        # Bulk copy into a temporary staging table (no WAL, no unique index
+        # checks), then merge into the target in a single statement. The
+        # staging table is private to this session, matches the current
+        # target schema and is dropped at commit
+        stage_table = f"{table_name}_stage"
+        cursor.execute(f"""
+        CREATE TEMP TABLE {stage_table}
+        (LIKE {table_name} INCLUDING DEFAULTS)
+        ON COMMIT DROP
+        """)
+        
+        # Nulls are written as \N so empty strings (e.g. direct-traffic
+        # referrers) are not read back as NULL
+        copy_query = f"COPY {stage_table} ({columns_str}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        
+        # Copy in batches to bound the size of the in-memory CSV buffer
+        for i in range(0, len(load_df), batch_size):
+            buffer = io.StringIO()
+            load_df.iloc[i:i+batch_size].to_csv(buffer, header=False, index=False, na_rep='\\N')
+            buffer.seek(0)
+            cursor.copy_expert(copy_query, buffer)
+        
+        merge_query = f"""
         INSERT INTO {table_name} ({columns_str})
-        VALUES ({placeholders})
+        SELECT DISTINCT ON (interaction_id, event_date) {columns_str}
+        FROM {stage_table}
         ON CONFLICT (interaction_id, event_date) DO NOTHING
         """
-        # Process in batches
-        batch_size = 100
-        inserted = 0
-        
-        for i in range(0, len(records), batch_size):
-            batch = records[i:i+batch_size]
-            
-            # Convert each record to a tuple of Python native types
-            batch_values = []
-            for record in batch:
-                row_values = []
-                for col in columns:
-                    val = record[col]
-                    # Explicitly convert NumPy types to Python native types
-                    if 'numpy.int' in str(type(val)):
-                        val = int(val)
-                    elif 'numpy.float' in str(type(val)):
-                        val = float(val)
-                    elif 'numpy' in str(type(val)) and 'datetime' in str(type(val)):
-                        val = val.strftime('%Y-%m-%d %H:%M:%S')
-                    elif val is None or (isinstance(val, float) and np.isnan(val)):
-                        val = None
-                    row_values.append(val)
-                batch_values.append(tuple(row_values))
-            
-            # Execute the batch
-            cursor.executemany(insert_query, batch_values)
-            inserted += cursor.rowcount
+        cursor.execute(merge_query)
+        inserted = cursor.rowcount
         
         # Commit the transaction
         conn.commit()
-        logger.info(f"Successfully loaded {inserted} new records (skipped {len(records) - inserted} duplicates)")
+        logger.info(f"Successfully loaded {inserted} new records (skipped {len(load_df) - inserted} duplicates)")
         
     except Exception as e:
         logger.error(f"Error loading data into database: {e}")
@@ -270,7 +335,8 @@ def create_database_schema():
         conn = connect_to_db()
         cursor = conn.cursor()
         
-        # Create user_interactions table with TEXT types for potentially problematic columns
+        # Create user_interactions table; date parts are stored as SMALLINT and
+        # the time of day is carried by timestamp
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS user_interactions (
             interaction_id VARCHAR(255) PRIMARY KEY,
@@ -282,12 +348,11 @@ def create_database_schema():
             device_type VARCHAR(50),
             referrer TEXT,
             event_date DATE NOT NULL,
-            event_time TIME NOT NULL,
-            event_hour TEXT,
-            event_day TEXT,
-            event_month TEXT,
-            event_year TEXT,
-            event_dayofweek TEXT,
+            event_hour SMALLINT,
+            event_day SMALLINT,
+            event_month SMALLINT,
+            event_year SMALLINT,
+            event_dayofweek SMALLINT,
             is_weekend BOOLEAN,
             content_category VARCHAR(100),
             article_id VARCHAR(100),
@@ -297,6 +362,28 @@ def create_database_schema():
         );
         """)
         
+        # Migrate tables created before event_time was dropped and the date
+        # parts became SMALLINT. The columns are checked first so an already
+        # migrated table is not locked by a no-op ALTER TABLE
+        cursor.execute("""
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND table_name = 'user_interactions'
+          AND column_name = ANY(%s)
+        """, (['event_time'] + DATE_PART_COLUMNS,))
+        column_types = dict(cursor.fetchall())
+        
+        if 'event_time' in column_types:
+            logger.info("Dropping user_interactions.event_time")
+            cursor.execute("ALTER TABLE user_interactions DROP COLUMN event_time")
+        
+        for col in DATE_PART_COLUMNS:
+            if col in column_types and column_types[col] != 'smallint':
+                logger.info(f"Converting user_interactions.{col} to SMALLINT")
+                cursor.execute(
+                    f"ALTER TABLE user_interactions ALTER COLUMN {col} TYPE SMALLINT USING {col}::smallint"
+                )
+        
         # Create indexes
         cursor.execute("""
         CREATE INDEX IF NOT EXISTS idx_user_interactions_user_id ON user_interactions(user_id);
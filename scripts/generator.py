@@ -1,13 +1,17 @@
-import json
+import orjson
 import random
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
+import numpy as np
 from faker import Faker
 
 # Initialize Faker
 fake = Faker()
 
+# Random generator for the vectorized draws
+rng = np.random.default_rng()
+
 # Configuration
 NUM_USERS = 100
 NUM_SESSIONS_PER_USER = 5
@@ -39,34 +43,38 @@ referrers = [
     ""  # Direct traffic
 ]
 
-def random_date_between(start_date, end_date):
-    """Generate a random datetime between start_date and end_date"""
-    delta = end_date - start_date
-    random_days = random.randrange(delta.days + 1)
-    random_seconds = random.randrange(86400)  # Seconds in a day
-    return start_date + timedelta(days=random_days, seconds=random_seconds)
-
-def generate_interaction(user_id, session_id, timestamp):
-    """Generate a single interaction event"""
-    category = random.choice(content_categories)
-    article_id = random.choice(article_ids)
-    action = random.choice(actions)
-    
-    return {
-        "user_id": user_id,
-        "timestamp": timestamp.strftime("%Y-%m-%dT%H:%M:%SZ"),
-        "page_url": f"https://news.example.com/{category}/article-{article_id}",
-        "action": action,
-        "device_type": random.choice(device_types),
-        "referrer": random.choice(referrers),
-        "session_id": session_id,
-        "time_spent_seconds": random.randint(5, 300) if action == "read" else None,
-        "scroll_depth": random.uniform(0.1, 1.0) if action in ["read", "video_play"] else None
-    }
-
 def generate_data():
     """Generate sample user interaction data"""
+    num_sessions = NUM_USERS * NUM_SESSIONS_PER_USER
+    num_interactions = num_sessions * NUM_INTERACTIONS_PER_SESSION
+    
+    # Draw every random value up front with vectorized NumPy calls; the
+    # Python loop below only assembles the records
+    
+    # Session start as a random day in the date range plus a random second of that day
+    session_days = rng.integers(0, (END_DATE - START_DATE).days + 1, num_sessions)
+    session_seconds = rng.integers(0, 86400, num_sessions)
+    session_starts = session_days * 86400 + session_seconds
+    
+    # Add some time between interactions (1-60 seconds)
+    interaction_offsets = (
+        np.repeat(session_starts, NUM_INTERACTIONS_PER_SESSION)
+        + np.tile(np.arange(NUM_INTERACTIONS_PER_SESSION), num_sessions)
+        * rng.integers(1, 61, num_interactions)
+    )
+    timestamps = np.datetime64(START_DATE, 's') + interaction_offsets.astype('timedelta64[s]')
+    timestamps = np.char.add(np.datetime_as_string(timestamps, unit='s'), 'Z').tolist()
+    
+    categories = rng.choice(content_categories, num_interactions).tolist()
+    articles = rng.choice(article_ids, num_interactions).tolist()
+    interaction_actions = rng.choice(actions, num_interactions).tolist()
+    devices = rng.choice(device_types, num_interactions).tolist()
+    interaction_referrers = rng.choice(referrers, num_interactions).tolist()
+    time_spent = rng.integers(5, 301, num_interactions).tolist()
+    scroll_depth = rng.uniform(0.1, 1.0, num_interactions).tolist()
+    
     data = []
+    i = 0
     
     for user_index in range(NUM_USERS):
         user_id = f"user_{uuid.uuid4().hex[:8]}"
@@ -74,16 +82,20 @@ def generate_data():
         for session_index in range(NUM_SESSIONS_PER_USER):
             session_id = f"session_{uuid.uuid4().hex[:10]}"
             
-            # Base timestamp 
-            session_start = random_date_between(START_DATE, END_DATE)
-            
             for interaction_index in range(NUM_INTERACTIONS_PER_SESSION):
-                # Add some time between interactions (1-60 seconds)
-                interaction_time = session_start + timedelta(seconds=interaction_index * random.randint(1, 60))
-                
-                # Generate interaction
-                interaction = generate_interaction(user_id, session_id, interaction_time)
-                data.append(interaction)
+                action = interaction_actions[i]
+                data.append({
+                    "user_id": user_id,
+                    "timestamp": timestamps[i],
+                    "page_url": f"https://news.example.com/{categories[i]}/article-{articles[i]}",
+                    "action": action,
+                    "device_type": devices[i],
+                    "referrer": interaction_referrers[i],
+                    "session_id": session_id,
+                    "time_spent_seconds": time_spent[i] if action == "read" else None,
+                    "scroll_depth": scroll_depth[i] if action in ["read", "video_play"] else None
+                })
+                i += 1
     
     return data
 
@@ -102,8 +114,10 @@ def save_data_to_files(data, num_files=5):
         file_data = data[start_idx:end_idx]
         file_path = os.path.join(OUTPUT_DIR, f"interactions_{i+1}.json")
         
-        with open(file_path, 'w') as f:
-            json.dump(file_data, f, indent=2)
+        # Write line-delimited JSON (one record per line)
+        with open(file_path, 'wb') as f:
+            f.write(b'\n'.join(orjson.dumps(record) for record in file_data))
+            f.write(b'\n')
         
         print(f"Generated {len(file_data)} interactions in {file_path}")
 
@@ -20,12 +20,11 @@ CREATE TABLE IF NOT EXISTS user_interactions (
     device_type VARCHAR(50),
     referrer TEXT,
     event_date DATE NOT NULL,
-    event_time TIME NOT NULL,
-    event_hour INTEGER,
-    event_day INTEGER,
-    event_month INTEGER,
-    event_year INTEGER,
-    event_dayofweek INTEGER,
+    event_hour SMALLINT,
+    event_day SMALLINT,
+    event_month SMALLINT,
+    event_year SMALLINT,
+    event_dayofweek SMALLINT,
     is_weekend BOOLEAN,
     content_category VARCHAR(100),
     article_id VARCHAR(100),